@@ -1,13 +1,14 @@
 """ASR (Automatic Speech Recognition) endpoint."""
 
 import logging
-from datetime import datetime
 
-from fastapi import APIRouter, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, File, UploadFile, status
 
 from api_v1.schemas import ASRResponse, ErrorResponse
+from utils import clock
 from utils.asr_utils import ASRError, process_audio_upload
-from utils.dependencies import HFClient
+from utils.dependencies import ASRBatcher
+from utils.errors import handle_errors
 
 logger = logging.getLogger(__name__)
 
@@ -25,9 +26,14 @@ router = APIRouter(prefix="/asr", tags=["ASR"])
     summary="Transcribe audio to text",
     description="Upload an audio file to transcribe speech to text using Whisper ASR",
 )
+@handle_errors(
+    ASRError,
+    status.HTTP_400_BAD_REQUEST,
+    "Audio transcription failed. Please try again.",
+)
 async def transcribe_audio_endpoint(
+    asr_batcher: ASRBatcher,
     file: UploadFile = File(..., description="Audio file (WAV, MP3, M4A)"),
-    hf_client: HFClient = None,
 ) -> ASRResponse:
     """
     Transcribe audio file to text.
@@ -35,28 +41,14 @@ async def transcribe_audio_endpoint(
     Accepts audio files in WAV, MP3, or M4A format and returns the transcribed text.
     Maximum file size is configurable (default 25MB).
     """
-    try:
-        logger.info(f"ASR request received - filename: {file.filename}")
-        
-        # Process audio upload
-        result = await process_audio_upload(hf_client, file)
-        
-        # Return response
-        return ASRResponse(
-            text=result["text"],
-            language=result.get("language", "en"),
-            timestamp=datetime.utcnow(),
-        )
-        
-    except ASRError as e:
-        logger.warning(f"ASR validation error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e),
-        )
-    except Exception as e:
-        logger.error(f"ASR processing failed: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Audio transcription failed. Please try again.",
-        )
+    logger.info("ASR request received - filename: %s", file.filename)
+    
+    # Process audio upload
+    result = await process_audio_upload(asr_batcher, file)
+    
+    # Return response
+    return ASRResponse(
+        text=result["text"],
+        language=result.get("language", "en"),
+        timestamp=clock.utcnow(),
+    )
@@ -1,13 +1,13 @@
 """Health check endpoint."""
 
 import logging
-from datetime import datetime
 
 from fastapi import APIRouter, status
 
 from api_v1.schemas import HealthResponse
 from config.settings import settings
-from utils.dependencies import get_hf_client, get_llm
+from utils import clock
+from utils.dependencies import get_asr_model, get_hf_client, get_llm
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +25,7 @@ async def health_check() -> HealthResponse:
     """
     Health check endpoint.
     
-    Returns the status of the API and its connected services (HuggingFace, LLM).
+    Returns the status of the API and its connected services (HuggingFace, Whisper, LLM).
     Useful for monitoring and ensuring all services are properly initialized.
     """
     services = {}
@@ -36,7 +36,15 @@ async def health_check() -> HealthResponse:
         services["huggingface"] = "connected" if hf_client else "disconnected"
     except Exception as e:
         services["huggingface"] = f"error: {str(e)}"
-        logger.warning(f"HuggingFace health check failed: {e}")
+        logger.warning("HuggingFace health check failed: %s", e)
+    
+    # Check local Whisper model
+    try:
+        asr_model = get_asr_model()
+        services["whisper"] = "connected" if asr_model else "disconnected"
+    except Exception as e:
+        services["whisper"] = f"error: {str(e)}"
+        logger.warning("Whisper health check failed: %s", e)
     
     # Check LLM
     try:
@@ -44,7 +52,7 @@ async def health_check() -> HealthResponse:
         services["llm"] = "connected" if llm else "disconnected"
     except Exception as e:
         services["llm"] = f"error: {str(e)}"
-        logger.warning(f"LLM health check failed: {e}")
+        logger.warning("LLM health check failed: %s", e)
     
     # Overall status
     overall_status = "healthy" if all(
@@ -56,5 +64,5 @@ async def health_check() -> HealthResponse:
         version=settings.app_version,
         environment=settings.environment,
         services=services,
-        timestamp=datetime.utcnow(),
+        timestamp=clock.utcnow(),
     )
@@ -1,18 +1,38 @@
 """Health chat endpoint for CBT-style reflective conversations."""
 
 import logging
-from datetime import datetime
+import sys
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
 
-from fastapi import APIRouter, HTTPException, status
+import orjson
+from fastapi import APIRouter, Response, status
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessage, HumanMessage
 
-from api_v1.schemas import ChatRequest, ChatResponse, ErrorResponse
-from utils.chat_utils import ChatError, generate_chat_response
-from utils.dependencies import get_conversation_memory, get_llm
+from api_v1.schemas import (
+    ChatBatchRequest,
+    ChatBatchResponse,
+    ChatRequest,
+    ChatResponse,
+    ErrorResponse,
+)
+from utils import clock, llm_cache
+from utils.chat_utils import (
+    ChatError,
+    generate_chat_response,
+    generate_chat_response_stream,
+    generate_chat_responses_batch,
+)
+from utils.dependencies import get_conversation_lock, get_conversation_memory, get_user_llm
+from utils.errors import handle_errors
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
+CHAT_FAILED_MESSAGE = "Chat response generation failed. Please try again."
+
 
 @router.post(
     "",
@@ -25,49 +45,169 @@ router = APIRouter(prefix="/chat", tags=["Chat"])
     summary="Get supportive chat response",
     description="Send a diary entry or message and receive a CBT-style supportive reflection",
 )
+@handle_errors(
+    ChatError,
+    status.HTTP_400_BAD_REQUEST,
+    CHAT_FAILED_MESSAGE,
+)
 async def chat_endpoint(
     request: ChatRequest,
+    response: Response,
 ) -> ChatResponse:
     """
     Generate a supportive, CBT-style response to user's message.
     
     This endpoint uses LangChain with conversation memory to provide context-aware,
     therapeutic-style reflections on the user's diary entries or messages.
+    Repeated messages in an identical conversation context are served from
+    cache; the ``X-Cache`` header reports ``HIT`` or ``MISS``.
     
     **Note**: This is a journaling assistant, not medical advice.
     """
-    try:
-        logger.info(f"Chat request received - user_id: {request.user_id or 'default'}")
-        
-        # Get LLM instance from backend configuration
-        llm = get_llm()
-        
-        # Get conversation memory for this user
-        user_id = request.user_id or "default"
+    logger.info("Chat request received - user_id: %s", request.user_id or "default")
+    
+    # Get conversation memory for this user
+    # Interned so memory lookups for repeat users compare by identity
+    user_id = sys.intern(request.user_id or "default")
+    
+    # Get LLM instance from backend configuration, keyed to the user's prompt cache
+    llm = get_user_llm(user_id)
+    
+    # One turn per user at a time, so each turn sees the previous one's reply
+    async with get_conversation_lock(user_id):
         memory = get_conversation_memory(user_id)
         
-        # Generate response
-        response_text = await generate_chat_response(
-            llm=llm,
-            memory=memory,
-            user_message=request.message,
+        # Generate response, reusing a cached one for an identical context.
+        # One snapshot serves both the cache key and the prompt.
+        history = await memory.aget_messages()
+        cache_key = llm_cache.make_cache_key(request.message, history)
+        response_text, cache_hit = await llm_cache.get_or_compute(
+            cache_key,
+            lambda: generate_chat_response(
+                llm=llm,
+                memory=memory,
+                user_message=request.message,
+                chat_history=history,
+            ),
         )
         
-        # Return response
-        return ChatResponse(
-            response=response_text,
-            timestamp=datetime.utcnow(),
-        )
+        if cache_hit:
+            # generate_chat_response records the turn itself on a miss
+            await memory.aadd_messages([
+                HumanMessage(content=request.message),
+                AIMessage(content=response_text),
+            ])
+    
+    response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+    
+    # Return response
+    return ChatResponse(
+        response=response_text,
+        timestamp=clock.utcnow(),
+    )
+
+
+@router.post(
+    "/batch",
+    response_model=ChatBatchResponse,
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid request"},
+        500: {"model": ErrorResponse, "description": "Chat processing failed"},
+    },
+    summary="Get supportive chat responses for several users",
+    description="Answer a group of messages from different users in one batched LLM call",
+)
+@handle_errors(
+    ChatError,
+    status.HTTP_400_BAD_REQUEST,
+    CHAT_FAILED_MESSAGE,
+)
+async def chat_batch_endpoint(request: ChatBatchRequest) -> ChatBatchResponse:
+    """
+    Generate supportive, CBT-style responses for a batch of users.
+    
+    Intended for upstream collectors that group queued messages; all turns are
+    sent to the provider together. Each user may appear at most once per batch,
+    since every turn is conditioned on that user's current history.
+    """
+    logger.info("Chat batch request received - size: %s", len(request.requests))
+    
+    user_ids = [sys.intern(item.user_id or "default") for item in request.requests]
+    if len(set(user_ids)) != len(user_ids):
+        raise ChatError("Each user_id may appear only once per batch")
+    
+    async with AsyncExitStack() as stack:
+        # Sorted so concurrent batches acquire overlapping users in the same order
+        for user_id in sorted(user_ids):
+            await stack.enter_async_context(get_conversation_lock(user_id))
         
-    except ChatError as e:
-        logger.warning(f"Chat validation error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e),
-        )
-    except Exception as e:
-        logger.error(f"Chat processing failed: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Chat response generation failed. Please try again.",
+        response_texts = await generate_chat_responses_batch(
+            llms=[get_user_llm(user_id) for user_id in user_ids],
+            memories=[get_conversation_memory(user_id) for user_id in user_ids],
+            user_messages=[item.message for item in request.requests],
         )
+    
+    timestamp = clock.utcnow()
+    return ChatBatchResponse(
+        responses=[
+            ChatResponse(response=text, timestamp=timestamp) for text in response_texts
+        ],
+    )
+
+
+def _sse_event(data: dict, event: str | None = None) -> bytes:
+    """Encode one server-sent event frame."""
+    frame = b"data: " + orjson.dumps(data) + b"\n\n"
+    if event is not None:
+        frame = f"event: {event}\n".encode() + frame
+    return frame
+
+
+@router.post(
+    "/stream",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid request"},
+        500: {"model": ErrorResponse, "description": "Chat processing failed"},
+    },
+    summary="Stream a supportive chat response",
+    description="Send a message and receive the CBT-style reflection as server-sent events",
+)
+@handle_errors(
+    ChatError,
+    status.HTTP_400_BAD_REQUEST,
+    CHAT_FAILED_MESSAGE,
+)
+async def chat_stream_endpoint(request: ChatRequest) -> StreamingResponse:
+    """
+    Stream a supportive, CBT-style response as server-sent events.
+    
+    Each ``data`` frame carries a ``{"token": ...}`` fragment as soon as the
+    model produces it, followed by an ``event: done`` frame. If generation
+    fails mid-stream an ``event: error`` frame is sent instead. Streamed
+    responses bypass the response cache.
+    """
+    logger.info("Chat stream request received - user_id: %s", request.user_id or "default")
+    
+    user_id = sys.intern(request.user_id or "default")
+    llm = get_user_llm(user_id)
+    
+    async def event_stream() -> AsyncIterator[bytes]:
+        try:
+            # Held for the whole stream, since memory is updated at its end
+            async with get_conversation_lock(user_id):
+                memory = get_conversation_memory(user_id)
+                async for token in generate_chat_response_stream(llm, memory, request.message):
+                    yield _sse_event({"token": token})
+            yield _sse_event({}, event="done")
+        except ChatError:
+            # Headers are already sent, so the failure is reported in-band
+            yield _sse_event({"detail": CHAT_FAILED_MESSAGE}, event="error")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
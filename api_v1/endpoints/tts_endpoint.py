@@ -1,14 +1,15 @@
 """TTS (Text-to-Speech) endpoint."""
 
 import logging
-from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, status
 from fastapi.responses import FileResponse
 
 from api_v1.schemas import ErrorResponse, TTSRequest, TTSResponse
+from utils import clock
 from utils.dependencies import HFClient
-from utils.tts_utils import TTSError, cleanup_audio_file, process_tts_request
+from utils.errors import handle_errors
+from utils.tts_utils import TTSError, process_tts_request
 
 logger = logging.getLogger(__name__)
 
@@ -26,45 +27,34 @@ router = APIRouter(prefix="/tts", tags=["TTS"])
     summary="Convert text to speech",
     description="Convert text to audio using text-to-speech synthesis",
 )
+@handle_errors(
+    TTSError,
+    status.HTTP_400_BAD_REQUEST,
+    "Text-to-speech conversion failed. Please try again.",
+)
 async def text_to_speech_endpoint(
     request: TTSRequest,
-    hf_client: HFClient = None,
+    hf_client: HFClient,
 ) -> FileResponse:
     """
     Convert text to speech audio.
     
     Accepts text and returns an audio file (WAV format) with the synthesized speech.
-    The audio file is automatically cleaned up after being sent to the client.
+    Audio is cached on disk by text, so repeated requests for the same text
+    are served without calling the TTS model again.
     """
-    try:
-        logger.info(f"TTS request received - text length: {len(request.text)} chars")
-        
-        # Process TTS request
-        filepath, file_size = await process_tts_request(hf_client, request.text)
-        
-        # Return audio file as response
-        return FileResponse(
-            path=str(filepath),
-            media_type="audio/wav",
-            filename=filepath.name,
-            headers={
-                "Content-Length": str(file_size),
-            },
-            background=None,  # Keep file until response is sent
-        )
-        
-    except TTSError as e:
-        logger.warning(f"TTS validation error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e),
-        )
-    except Exception as e:
-        logger.error(f"TTS processing failed: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Text-to-speech conversion failed. Please try again.",
-        )
+    logger.info("TTS request received - text length: %s chars", len(request.text))
+    
+    # Process TTS request
+    artifact = await process_tts_request(hf_client, request.text)
+    
+    # Return audio file as response; the precomputed stat sets Content-Length
+    return FileResponse(
+        path=artifact.path,
+        media_type="audio/wav",
+        filename=artifact.path.name,
+        stat_result=artifact.stat_result,
+    )
 
 
 @router.post(
@@ -74,9 +64,14 @@ async def text_to_speech_endpoint(
     summary="Convert text to speech (JSON response)",
     description="Alternative endpoint that returns JSON with audio file information",
 )
+@handle_errors(
+    TTSError,
+    status.HTTP_400_BAD_REQUEST,
+    "Text-to-speech conversion failed. Please try again.",
+)
 async def text_to_speech_json_endpoint(
     request: TTSRequest,
-    hf_client: HFClient = None,
+    hf_client: HFClient,
 ) -> TTSResponse:
     """
     Convert text to speech and return JSON with file information.
@@ -84,32 +79,15 @@ async def text_to_speech_json_endpoint(
     This is an alternative to the main TTS endpoint that returns metadata
     instead of the audio file directly.
     """
-    try:
-        logger.info(f"TTS JSON request received - text length: {len(request.text)} chars")
-        
-        # Process TTS request
-        filepath, file_size = await process_tts_request(hf_client, request.text)
-        
-        # Calculate duration estimate (rough approximation)
-        duration_estimate = len(request.text) / 15  # ~15 chars per second speech
-        
-        # Return response
-        return TTSResponse(
-            audio_url=f"/temp_audio/{filepath.name}",
-            duration_seconds=round(duration_estimate, 1),
-            format="wav",
-            timestamp=datetime.utcnow(),
-        )
-        
-    except TTSError as e:
-        logger.warning(f"TTS validation error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e),
-        )
-    except Exception as e:
-        logger.error(f"TTS processing failed: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Text-to-speech conversion failed. Please try again.",
-        )
+    logger.info("TTS JSON request received - text length: %s chars", len(request.text))
+    
+    # Process TTS request
+    artifact = await process_tts_request(hf_client, request.text)
+    
+    # Return response
+    return TTSResponse(
+        audio_url=f"/temp_audio/{artifact.path.name}",
+        duration_seconds=artifact.duration,
+        format="wav",
+        timestamp=clock.utcnow(),
+    )
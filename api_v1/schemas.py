@@ -1,9 +1,11 @@
 """Pydantic schemas for API request and response models."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+
+from utils import clock
 
 
 # ASR Schemas
@@ -16,46 +18,44 @@ class ASRResponse(BaseModel):
         None, description="Audio duration in seconds"
     )
     timestamp: datetime = Field(
-        default_factory=datetime.utcnow, description="Timestamp of transcription"
+        default_factory=clock.utcnow,
+        description="Timestamp of transcription",
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "text": "I had a really stressful day at work today.",
                 "language": "en",
                 "duration_seconds": 5.2,
                 "timestamp": "2026-01-28T02:00:00Z",
             }
-        }
+        },
+    )
 
 
 # Chat Schemas
 class ChatRequest(BaseModel):
     """Request to chat endpoint with user message."""
 
-    message: str = Field(
-        ..., min_length=1, max_length=5000, description="User's diary entry or message"
-    )
+    # Stripped and length-checked in pydantic-core; whitespace-only fails min_length
+    message: Annotated[
+        str, StringConstraints(strip_whitespace=True, min_length=1, max_length=5000)
+    ] = Field(..., description="User's diary entry or message")
     user_id: Optional[str] = Field(
         None, description="Optional user ID for conversation tracking"
     )
 
-    @field_validator("message")
-    @classmethod
-    def validate_message(cls, v: str) -> str:
-        """Validate message is not empty after stripping."""
-        if not v.strip():
-            raise ValueError("Message cannot be empty or only whitespace")
-        return v.strip()
-
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="forbid",
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "message": "I had a really stressful day at work today.",
                 "user_id": "user_123",
             }
-        }
+        },
+    )
 
 
 class ChatResponse(BaseModel):
@@ -63,40 +63,64 @@ class ChatResponse(BaseModel):
 
     response: str = Field(..., description="AI-generated supportive response")
     timestamp: datetime = Field(
-        default_factory=datetime.utcnow, description="Response timestamp"
+        default_factory=clock.utcnow,
+        description="Response timestamp",
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "response": "It sounds like today was challenging for you. What made work particularly stressful?",
                 "timestamp": "2026-01-28T02:00:05Z",
             }
-        }
+        },
+    )
+
+
+class ChatBatchRequest(BaseModel):
+    """Request to the batch chat endpoint with one turn per user."""
+
+    requests: list[ChatRequest] = Field(
+        ..., min_length=1, max_length=64, description="Chat turns to answer together"
+    )
+
+    model_config = ConfigDict(
+        extra="forbid",
+        frozen=True,
+        json_schema_extra={
+            "example": {
+                "requests": [
+                    {"message": "I had a really stressful day at work today.", "user_id": "user_1"},
+                    {"message": "I finally slept well last night.", "user_id": "user_2"},
+                ]
+            }
+        },
+    )
+
+
+class ChatBatchResponse(BaseModel):
+    """Response from the batch chat endpoint, aligned with the request order."""
+
+    responses: list[ChatResponse] = Field(..., description="One response per request")
 
 
 # TTS Schemas
 class TTSRequest(BaseModel):
     """Request to TTS endpoint with text to convert to speech."""
 
-    text: str = Field(
-        ..., min_length=1, max_length=2000, description="Text to convert to speech"
-    )
-    
-    @field_validator("text")
-    @classmethod
-    def validate_text(cls, v: str) -> str:
-        """Validate text is not empty after stripping."""
-        if not v.strip():
-            raise ValueError("Text cannot be empty or only whitespace")
-        return v.strip()
+    text: Annotated[
+        str, StringConstraints(strip_whitespace=True, min_length=1, max_length=2000)
+    ] = Field(..., description="Text to convert to speech")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="forbid",
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "text": "It sounds like today was challenging for you. What made work particularly stressful?"
             }
-        }
+        },
+    )
 
 
 class TTSResponse(BaseModel):
@@ -108,18 +132,20 @@ class TTSResponse(BaseModel):
     )
     format: str = Field(default="wav", description="Audio format")
     timestamp: datetime = Field(
-        default_factory=datetime.utcnow, description="Generation timestamp"
+        default_factory=clock.utcnow,
+        description="Generation timestamp",
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "audio_url": "/temp/audio_abc123.wav",
                 "duration_seconds": 4.8,
                 "format": "wav",
                 "timestamp": "2026-01-28T02:00:10Z",
             }
-        }
+        },
+    )
 
 
 # Health Check Schema
@@ -133,11 +159,12 @@ class HealthResponse(BaseModel):
         default_factory=dict, description="Status of dependent services"
     )
     timestamp: datetime = Field(
-        default_factory=datetime.utcnow, description="Health check timestamp"
+        default_factory=clock.utcnow,
+        description="Health check timestamp",
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "healthy",
                 "version": "0.1.0",
@@ -148,7 +175,8 @@ class HealthResponse(BaseModel):
                 },
                 "timestamp": "2026-01-28T02:00:00Z",
             }
-        }
+        },
+    )
 
 
 # Error Response Schema
@@ -159,15 +187,17 @@ class ErrorResponse(BaseModel):
     message: str = Field(..., description="Human-readable error message")
     detail: Optional[str] = Field(None, description="Additional error details")
     timestamp: datetime = Field(
-        default_factory=datetime.utcnow, description="Error timestamp"
+        default_factory=clock.utcnow,
+        description="Error timestamp",
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "error": "ValidationError",
                 "message": "Invalid audio file format",
                 "detail": "Supported formats: WAV, MP3, M4A",
                 "timestamp": "2026-01-28T02:00:00Z",
             }
-        }
+        },
+    )
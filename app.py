@@ -11,14 +11,15 @@ from dotenv import load_dotenv
 load_dotenv()
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from api_v1 import api_v1_router
 from config.logging import setup_logging
 from config.settings import settings
-from utils.dependencies import cleanup_clients, initialize_clients
-from utils.tts_utils import cleanup_old_audio_files
+from utils import clock, llm_cache
+from utils.dependencies import cleanup_clients, get_asr_batcher, initialize_clients
+from utils.tts_utils import index_cached_audio
 
 
 
@@ -33,30 +34,39 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     """Application lifespan context manager for startup and shutdown events."""
  
     logger.info("=" * 60)
-    logger.info(f"Starting {settings.app_name} v{settings.app_version}")
-    logger.info(f"Environment: {settings.environment}")
+    logger.info("Starting %s v%s", settings.app_name, settings.app_version)
+    logger.info("Environment: %s", settings.environment)
     logger.info("=" * 60)
     
 
     missing_keys = settings.validate_required_keys()
     if missing_keys:
-        logger.error(f"Missing required API keys: {', '.join(missing_keys)}")
+        logger.error("Missing required API keys: %s", ", ".join(missing_keys))
         logger.error("Please set these environment variables before starting the app")
         raise RuntimeError(f"Missing required API keys: {', '.join(missing_keys)}")
     
+    clock.start()
+    
     try:
         initialize_clients()
+        get_asr_batcher().start()
         logger.info("All services initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize services: {e}")
+        logger.error("Failed to initialize services: %s", e)
         raise
     
+    # Generated audio doubles as the TTS cache, bounded by TTS_CACHE_MAX_MB.
+    # temp_audio/ is shared by all workers, so it is not purged on shutdown.
+    await index_cached_audio()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
-    cleanup_clients()
-    cleanup_old_audio_files(max_age_seconds=0)  # Clean all temp files on shutdown
+    await get_asr_batcher().stop()
+    await llm_cache.close()
+    await cleanup_clients()
+    await clock.stop()
     logger.info("Shutdown complete")
 
 
@@ -66,6 +76,7 @@ app = FastAPI(
     version=settings.app_version,
     description="AI-powered journaling app with speech-to-text, CBT-style chat, and text-to-speech",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -83,11 +94,11 @@ app.add_middleware(
 
 # Global exception handler
 @app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def global_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
     """Global exception handler for unhandled errors."""
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": "InternalServerError",
@@ -99,9 +110,9 @@ async def global_exception_handler(request: Request, exc: Exception) -> JSONResp
 
 # HTTP exception handler
 @app.exception_handler(HTTPException)
-async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
+async def http_exception_handler(request: Request, exc: HTTPException) -> ORJSONResponse:
     """Handler for HTTP exceptions."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.__class__.__name__,
@@ -121,7 +132,7 @@ try:
     temp_audio_dir.mkdir(exist_ok=True)
     app.mount("/temp_audio", StaticFiles(directory=str(temp_audio_dir)), name="temp_audio")
 except Exception as e:
-    logger.warning(f"Could not mount temp_audio directory: {e}")
+    logger.warning("Could not mount temp_audio directory: %s", e)
 
 
 # Root endpoint
@@ -143,12 +154,24 @@ async def root():
 
 
 if __name__ == "__main__":
+    import os
+    import sys
+    
     import uvicorn
     
+    reload = settings.environment == "development"
+    
     uvicorn.run(
         "app:app",
         host="0.0.0.0",
         port=8000,
-        reload=settings.environment == "development",
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        # --reload only supports a single worker
+        workers=1 if reload else max(1, (os.cpu_count() or 2) // 2),
+        # Shed load with 503s instead of queueing unbounded connections
+        limit_concurrency=256,
+        reload=reload,
         log_level=settings.log_level.lower(),
     )
@@ -18,18 +18,27 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = "\033[0m"
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Colored level names are built once instead of on every record
+        self._colored_levelnames = {
+            level: f"{color}{level}{self.RESET}" for level, color in self.COLORS.items()
+        }
+
     def format(self, record: logging.LogRecord) -> str:
         """Format the logs with color."""
-        if settings.environment == "development":
-            levelname = record.levelname
-            if levelname in self.COLORS:
-                record.levelname = f"{self.COLORS[levelname]}{levelname}{self.RESET}"
+        record.levelname = self._colored_levelnames.get(record.levelname, record.levelname)
         return super().format(record)
 
 
 def setup_logging() -> None:
     """Configure application logging."""
     
+    # None of the formats use process/thread fields, skip collecting them per record
+    logging.logProcesses = False
+    logging.logThreads = False
+    logging.logMultiprocessing = False
+    
     # Create root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(settings.log_level)
@@ -65,7 +74,9 @@ def setup_logging() -> None:
     # Log initial setup
     logger = logging.getLogger(__name__)
     logger.info(
-        f"Logging configured - Level: {settings.log_level}, Environment: {settings.environment}"
+        "Logging configured - Level: %s, Environment: %s",
+        settings.log_level,
+        settings.environment,
     )
 
 
@@ -1,5 +1,6 @@
 """Application settings using Pydantic Settings for type-safe configuration."""
 
+from functools import cached_property
 from typing import Any, Literal
 
 from pydantic import Field, field_validator
@@ -41,13 +42,38 @@ class Settings(BaseSettings):
 
 
     huggingface_api_key: str = Field(default="", description="Hugging Face API token")
+    asr_backend: Literal["faster-whisper", "onnx"] = Field(
+        default="faster-whisper", description="Local Whisper inference backend"
+    )
     whisper_model: str = Field(
-        default="openai/whisper-large-v3-turbo", description="Whisper ASR model"
+        default="large-v3-turbo", description="Whisper ASR model (faster-whisper/CTranslate2)"
+    )
+    whisper_device: Literal["cpu", "cuda", "auto"] = Field(
+        default="cpu", description="Device to run the local Whisper model on"
+    )
+    whisper_compute_type: str = Field(
+        default="int8", description="CTranslate2 compute type (int8, int8_float16, float16, ...)"
     )
     tts_model: str = Field(
         default="facebook/mms-tts-eng", description="Text-to-speech model"
     )
+    whisper_onnx_path: str = Field(
+        default="models/whisper-onnx",
+        description="Directory with the optimized ONNX Whisper model (ASR_BACKEND=onnx)",
+    )
+    whisper_onnx_provider: str = Field(
+        default="CPUExecutionProvider", description="ONNX Runtime execution provider"
+    )
+    asr_batch_size: int = Field(
+        default=8, ge=1, description="Maximum audio items per batched Whisper call"
+    )
+    asr_batch_window_ms: int = Field(
+        default=20, ge=0, description="Time to wait for more ASR requests before running a batch (ONNX backend)"
+    )
     hf_timeout: int = Field(default=60, description="HuggingFace API timeout in seconds")
+    tts_concurrency: int = Field(
+        default=3, ge=1, description="Maximum concurrent HuggingFace TTS requests"
+    )
 
 
     llm_provider: Literal["openai", "anthropic", "cohere", "huggingface", "germini"] = Field(
@@ -63,31 +89,62 @@ class Settings(BaseSettings):
     llm_max_tokens: int = Field(
         default=500, ge=1, description="Maximum tokens in LLM response"
     )
+    llm_max_concurrency: int = Field(
+        default=8, ge=1, description="Maximum concurrent LLM calls per batched chat request"
+    )
 
 
     conversation_memory_size: int = Field(
-        default=5, ge=1, le=20, description="Number of previous messages to keep"
+        default=5, ge=1, le=20, description="Number of previous exchanges (user + AI message pairs) to keep"
+    )
+    max_tracked_users: int = Field(
+        default=10_000, ge=1, description="Maximum users whose conversation memory is kept"
+    )
+    memory_idle_ttl: int = Field(
+        default=3600, ge=1, description="Seconds of inactivity after which a conversation is dropped"
+    )
+
+    # LLM response cache
+    llm_cache_size: int = Field(
+        default=1024, ge=1, description="Maximum chat responses kept in the in-process cache"
+    )
+    llm_cache_ttl: int = Field(
+        default=3600, ge=1, description="Chat response cache TTL in seconds"
+    )
+    redis_url: str = Field(
+        default="", description="Redis URL for the shared cache tier (empty disables Redis)"
     )
 
     # File Upload Limitation
     max_audio_file_size_mb: int = Field(
         default=25, ge=1, le=100, description="Maximum audio file size in MB"
     )
-    allowed_audio_formats: set[str] = Field(
-        default={"audio/wav", "audio/mpeg", "audio/mp4", "audio/x-m4a"},
+    allowed_audio_formats: frozenset[str] = Field(
+        default=frozenset({"audio/wav", "audio/mpeg", "audio/mp4", "audio/x-m4a"}),
         description="Allowed audio MIME types",
     )
 
 
+    # Generated audio cache
+    tts_cache_max_mb: int = Field(
+        default=512, ge=1, description="Per-worker disk budget for cached TTS audio in MB"
+    )
+
+
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = Field(
         default="INFO", description="Logging level"
     )
 
-    @property
+    @cached_property
     def max_audio_file_size_bytes(self) -> int:
         """Convert MB to bytes for file size validation."""
         return self.max_audio_file_size_mb * 1024 * 1024
 
+    @cached_property
+    def tts_cache_max_bytes(self) -> int:
+        """Convert MB to bytes for the TTS audio cache budget."""
+        return self.tts_cache_max_mb * 1024 * 1024
+
     def validate_required_keys(self) -> list[str]:
         """Validate that required API keys are set. Returns list of missing keys."""
         missing = []
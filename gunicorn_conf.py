@@ -0,0 +1,20 @@
+"""Gunicorn configuration for production deployment.
+
+Runs the app in several Uvicorn worker processes. With ``preload_app`` the
+app's modules are imported once in the master and shared with the forked
+workers copy-on-write. The Whisper model is loaded in each worker's lifespan,
+after the fork: its inference threads would not survive being forked.
+
+Usage:
+    pdm install -G gunicorn
+    pdm run serve
+"""
+
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+preload_app = True
+workers = int(os.getenv("WEB_CONCURRENCY", max(1, (os.cpu_count() or 2) // 2)))
+worker_class = "uvicorn_worker.UvicornWorker"
+worker_connections = 1000
+timeout = 120
@@ -0,0 +1,107 @@
+"""Export Whisper to ONNX and apply ONNX Runtime transformer fusions.
+
+Offline step for ``ASR_BACKEND=onnx``. Exports the model with optimum, then
+runs ONNX Runtime's BART-type optimizer on every exported graph: attention
+and multi-head-attention fusion, bias/reshape fusion and the other
+encoder-decoder rewrites. The raw export goes to a scratch directory next to
+the output and is deleted afterwards; only the optimized graphs, configs and
+processor files are written to the output directory, which is what
+``WHISPER_ONNX_PATH`` should point at.
+
+Usage:
+    pdm install -G onnx
+    python scripts/optimize_whisper.py --model openai/whisper-large-v3-turbo \\
+        --output models/whisper-onnx
+"""
+
+import argparse
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+
+from onnxruntime.transformers.fusion_options import FusionOptions
+from onnxruntime.transformers.optimizer import optimize_model
+from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+from transformers import AutoConfig, AutoProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def export_model(model_id: str, output_dir: Path) -> None:
+    """Export a Whisper checkpoint and its processor to ONNX.
+
+    Args:
+        model_id: HuggingFace model id or local checkpoint path
+        output_dir: Directory to write the ONNX model to
+    """
+    model = ORTModelForSpeechSeq2Seq.from_pretrained(model_id, export=True)
+    model.save_pretrained(output_dir)
+    AutoProcessor.from_pretrained(model_id).save_pretrained(output_dir)
+    logger.info("Exported %s to %s", model_id, output_dir)
+
+
+def optimize_graphs(
+    export_dir: Path, output_dir: Path, num_heads: int, hidden_size: int
+) -> None:
+    """Apply transformer fusions to every exported ONNX graph.
+
+    Optimized graphs are written to ``output_dir`` with their weights in a
+    single ``<graph>.onnx.data`` file. Everything else in ``export_dir``
+    (configs, processor files) is copied alongside; optimum's original
+    external data files are left behind with the export.
+
+    Args:
+        export_dir: Directory containing the exported ``*.onnx`` files
+        output_dir: Directory to write the optimized model to
+        num_heads: Number of attention heads
+        hidden_size: Model hidden size
+    """
+    options = FusionOptions("bart")
+    options.use_multi_head_attention = True
+
+    for graph in sorted(export_dir.glob("*.onnx")):
+        optimized = optimize_model(
+            str(graph),
+            model_type="bart",
+            num_heads=num_heads,
+            hidden_size=hidden_size,
+            optimization_options=options,
+        )
+        optimized.save_model_to_file(
+            str(output_dir / graph.name), use_external_data_format=True
+        )
+        logger.info("Optimized %s", graph.name)
+
+    for path in sorted(export_dir.iterdir()):
+        # Graphs and their weights were rewritten above
+        if path.is_file() and ".onnx" not in path.name:
+            shutil.copy2(path, output_dir / path.name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--model", default="openai/whisper-large-v3-turbo", help="Whisper checkpoint to export"
+    )
+    parser.add_argument(
+        "--output", type=Path, default=Path("models/whisper-onnx"), help="Output directory"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
+
+    config = AutoConfig.from_pretrained(args.model)
+    args.output.mkdir(parents=True, exist_ok=True)
+
+    # Scratch space on the same filesystem; the raw export is several GB
+    with tempfile.TemporaryDirectory(dir=args.output.parent) as scratch:
+        export_dir = Path(scratch)
+        export_model(args.model, export_dir)
+        optimize_graphs(
+            export_dir, args.output, config.encoder_attention_heads, config.d_model
+        )
+
+
+if __name__ == "__main__":
+    main()
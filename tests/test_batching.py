@@ -0,0 +1,124 @@
+"""Tests for the ASR micro-batching queue."""
+
+import asyncio
+import threading
+
+import pytest
+
+from utils.batching import BatchedASR
+
+# Generous bound for anything that should happen promptly
+TIMEOUT = 2
+
+
+@pytest.mark.asyncio
+async def test_results_resolve_per_item():
+    release = threading.Event()
+
+    def transcribe(audios, on_result):
+        on_result(0, audios[0].upper())
+        release.wait(TIMEOUT)
+        on_result(1, audios[1].upper())
+
+    batcher = BatchedASR(transcribe, max_batch_size=2, window_ms=50)
+    batcher.start()
+    try:
+        first = asyncio.create_task(batcher.submit("a"))
+        second = asyncio.create_task(batcher.submit("b"))
+
+        # The first item resolves while the batch is still running
+        assert await asyncio.wait_for(first, TIMEOUT) == "A"
+        assert not second.done()
+
+        release.set()
+        assert await asyncio.wait_for(second, TIMEOUT) == "B"
+    finally:
+        release.set()
+        await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_item_errors_are_isolated():
+    def transcribe(audios, on_result):
+        for index, audio in enumerate(audios):
+            on_result(index, ValueError(audio) if audio == "bad" else audio)
+
+    batcher = BatchedASR(transcribe, max_batch_size=2, window_ms=50)
+    batcher.start()
+    try:
+        bad = asyncio.create_task(batcher.submit("bad"))
+        good = asyncio.create_task(batcher.submit("good"))
+
+        with pytest.raises(ValueError, match="bad"):
+            await asyncio.wait_for(bad, TIMEOUT)
+        assert await asyncio.wait_for(good, TIMEOUT) == "good"
+    finally:
+        await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_fails_every_item_and_worker_survives():
+    def transcribe(audios, on_result):
+        if "boom" in audios:
+            raise RuntimeError("model crashed")
+        for index, audio in enumerate(audios):
+            on_result(index, audio)
+
+    batcher = BatchedASR(transcribe, max_batch_size=2, window_ms=50)
+    batcher.start()
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                batcher.submit("boom"), batcher.submit("other"), return_exceptions=True
+            ),
+            TIMEOUT,
+        )
+        assert all(
+            isinstance(result, RuntimeError) and str(result) == "model crashed"
+            for result in results
+        )
+
+        # The next batch is still served
+        assert await asyncio.wait_for(batcher.submit("next"), TIMEOUT) == "next"
+    finally:
+        await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_queued_requests():
+    started = threading.Event()
+    release = threading.Event()
+
+    def transcribe(audios, on_result):
+        started.set()
+        release.wait(TIMEOUT)
+        for index, audio in enumerate(audios):
+            on_result(index, audio)
+
+    batcher = BatchedASR(transcribe, max_batch_size=1, window_ms=0)
+    batcher.start()
+    try:
+        running = asyncio.create_task(batcher.submit("running"))
+        assert await asyncio.to_thread(started.wait, TIMEOUT)
+
+        # Queued behind the running batch
+        queued = asyncio.create_task(batcher.submit("queued"))
+        await asyncio.sleep(0)
+
+        await batcher.stop()
+
+        with pytest.raises(RuntimeError, match="ASR batcher stopped"):
+            await asyncio.wait_for(queued, TIMEOUT)
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(running, TIMEOUT)
+        assert not batcher.running
+    finally:
+        release.set()
+
+
+@pytest.mark.asyncio
+async def test_submit_requires_running_batcher():
+    batcher = BatchedASR(lambda audios, on_result: None, max_batch_size=1, window_ms=0)
+
+    with pytest.raises(RuntimeError, match="not running"):
+        await batcher.submit("audio")
@@ -1,25 +1,71 @@
 """ASR (Automatic Speech Recognition) utility functions."""
 
+import asyncio
 import logging
-from io import BytesIO
-from typing import BinaryIO
+import os
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO
 
+import numpy as np
+import soundfile as sf
+import soxr
 from fastapi import UploadFile
-from huggingface_hub import AsyncInferenceClient
+from faster_whisper import BatchedInferencePipeline
 
 from config.settings import settings
+from utils.batching import BatchedASR, ResultCallback
 
 logger = logging.getLogger(__name__)
 
+# Uploads are copied in 64 KiB chunks and kept in memory up to 1 MiB
+UPLOAD_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+
+# Hoisted so per-upload validation is a frozenset lookup and an int compare
+ALLOWED_AUDIO_FORMATS = settings.allowed_audio_formats
+MAX_AUDIO_FILE_SIZE_BYTES = settings.max_audio_file_size_bytes
+
+# Whisper's feature extractors expect 16 kHz mono float32 samples
+WHISPER_SAMPLE_RATE = 16000
+# Frames decoded per block (about 1.5 s at 44.1 kHz)
+DECODE_BLOCK_FRAMES = 64 * 1024
+
+# Uploads decoded or queued at once: one batch running plus one being collected.
+# Bounds the 16 kHz arrays resident while requests wait for the model
+ASR_INFLIGHT = asyncio.Semaphore(2 * settings.asr_batch_size)
+
+# Decoding is CPU-bound, so more threads than cores gains nothing. Kept apart
+# from the default executor so decodes never queue ahead of file and Redis I/O.
+# Threads start on first use, i.e. after gunicorn has forked the worker
+DECODE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=min(2 * settings.asr_batch_size, os.cpu_count() or 1),
+    thread_name_prefix="asr-decode",
+)
+
+# Decoded samples, or the encoded file when it could not be decoded up front
+AudioInput = np.ndarray | BinaryIO
+
 
 class ASRError(Exception):
     """Custom exception for ASR-related errors."""
     pass
 
 
+def _sync_size(fileobj: BinaryIO) -> int:
+    """Return the size of a seekable file object (blocking)."""
+    position = fileobj.tell()
+    size = fileobj.seek(0, 2)
+    fileobj.seek(position)
+    return size
+
+
 async def validate_audio_file(file: UploadFile) -> None:
     """Validate uploaded audio file.
     
+    Rejects oversized uploads early when their size is known; the limit is
+    also enforced while streaming the upload in ``process_audio_upload``.
+    
     Args:
         file: Uploaded audio file
         
@@ -27,39 +73,172 @@ async def validate_audio_file(file: UploadFile) -> None:
         ASRError: If file validation fails
     """
     # Check content type
-    if file.content_type not in settings.allowed_audio_formats:
-        allowed = ", ".join(settings.allowed_audio_formats)
+    if file.content_type not in ALLOWED_AUDIO_FORMATS:
+        allowed = ", ".join(sorted(ALLOWED_AUDIO_FORMATS))
         raise ASRError(
             f"Invalid audio format: {file.content_type}. Allowed formats: {allowed}"
         )
     
-    # Check file size
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to beginning
+    # Check file size without blocking the event loop on a disk-backed upload
+    if file.size is not None:
+        file_size = file.size
+    else:
+        file_size = await asyncio.to_thread(_sync_size, file.file)
     
-    if file_size > settings.max_audio_file_size_bytes:
+    if file_size > MAX_AUDIO_FILE_SIZE_BYTES:
         max_mb = settings.max_audio_file_size_mb
         actual_mb = file_size / (1024 * 1024)
         raise ASRError(
             f"File too large: {actual_mb:.1f}MB. Maximum allowed: {max_mb}MB"
         )
     
-    if file_size == 0:
-        raise ASRError("Empty audio file")
+    logger.debug("Audio file validated: %s, size: %s bytes", file.filename, file_size)
+
+
+def decode_audio(audio: BinaryIO) -> AudioInput:
+    """Decode audio to 16 kHz mono float32 samples (blocking).
     
-    logger.debug(f"Audio file validated: {file.filename}, size: {file_size} bytes")
+    Runs on ``DECODE_EXECUTOR`` so decoding and resampling overlap
+    with the model transcribing the previous batch. The file is decoded in
+    blocks that are downmixed and resampled as they stream through, so only
+    the 16 kHz mono output is ever held in full, never the native-rate,
+    multi-channel decode. Formats libsndfile cannot read (e.g. M4A) are
+    returned as-is for the backend to decode itself.
+    
+    Args:
+        audio: File-like object containing encoded audio
+        
+    Returns:
+        Float32 samples at 16 kHz, or the original file object
+        
+    Raises:
+        soundfile.SoundFileError: If the header parses but the body is corrupt
+    """
+    try:
+        sound_file = sf.SoundFile(audio)
+    except sf.SoundFileError:
+        audio.seek(0)
+        return audio
+    
+    with sound_file:
+        sample_rate = sound_file.samplerate
+        resampler = None
+        if sample_rate != WHISPER_SAMPLE_RATE:
+            resampler = soxr.ResampleStream(
+                sample_rate, WHISPER_SAMPLE_RATE, 1, dtype="float32"
+            )
+        
+        # Sized from the header, with headroom for resampler rounding
+        expected = sound_file.frames * WHISPER_SAMPLE_RATE // sample_rate + DECODE_BLOCK_FRAMES
+        samples = np.empty(max(expected, 0), dtype=np.float32)
+        length = 0
+        
+        def append(chunk: np.ndarray) -> None:
+            nonlocal samples, length
+            end = length + len(chunk)
+            if end > len(samples):
+                samples = np.resize(samples, max(end, 2 * len(samples)))
+            samples[length:end] = chunk
+            length = end
+        
+        for block in sound_file.blocks(
+            blocksize=DECODE_BLOCK_FRAMES, dtype="float32", always_2d=True
+        ):
+            mono = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+            append(resampler.resample_chunk(mono) if resampler else mono)
+        
+        if resampler is not None:
+            append(resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+    
+    # Copy out so the headroom is released rather than pinned by a view
+    return samples[:length].copy() if length < len(samples) else samples
+
+
+def _run_whisper(pipeline: BatchedInferencePipeline, audio: AudioInput) -> tuple[str, str]:
+    """Run blocking Whisper inference and collect the transcript.
+    
+    Args:
+        pipeline: faster-whisper batched inference pipeline
+        audio: Decoded 16 kHz samples or a file-like object with encoded audio
+        
+    Returns:
+        Tuple of (text, detected_language)
+    """
+    # batch_size here is faster-whisper's per-file chunk batch; keep its default
+    segments, info = pipeline.transcribe(audio)
+    # Segments are lazily decoded, so consume them inside the worker thread
+    text = "".join(segment.text for segment in segments)
+    return text, info.language
+
+
+def transcribe_batch(
+    pipeline: BatchedInferencePipeline,
+    audios: list[AudioInput],
+    on_result: ResultCallback,
+) -> None:
+    """Transcribe a batch of coalesced requests in a single worker thread.
+    
+    faster-whisper batches the 30s chunks within one file, not across files,
+    so items run one after another and each is reported as soon as it is
+    done. Failures are reported per item so one bad upload does not fail the
+    batch.
+    
+    Args:
+        pipeline: faster-whisper batched inference pipeline
+        audios: Decoded samples or file-like objects, one per request
+        on_result: Called with (index, (text, language) or exception) per item
+    """
+    for index, audio in enumerate(audios):
+        try:
+            on_result(index, _run_whisper(pipeline, audio))
+        except Exception as e:
+            on_result(index, e)
+
+
+def transcribe_batch_onnx(
+    asr_pipeline: Any,
+    audios: list[AudioInput],
+    on_result: ResultCallback,
+) -> None:
+    """Transcribe a batch of coalesced requests with the ONNX Runtime backend.
+    
+    Unlike faster-whisper, the transformers pipeline can run different files
+    through the encoder together. If the batch fails (e.g. one file cannot be
+    decoded) each file is retried on its own so errors stay per item.
+    
+    Args:
+        asr_pipeline: transformers ASR pipeline wrapping an ORTModelForSpeechSeq2Seq
+        audios: Decoded samples or file-like objects, one per request
+        on_result: Called with (index, (text, language) or exception) per item.
+            The language is not reported by this backend and is passed as None.
+    """
+    # The pipeline takes 16 kHz arrays directly and decodes raw bytes with ffmpeg
+    inputs = [audio if isinstance(audio, np.ndarray) else audio.read() for audio in audios]
+    try:
+        outputs = asr_pipeline(inputs, batch_size=len(inputs))
+    except Exception:
+        logger.debug("Batched ONNX transcription failed, retrying items individually")
+    else:
+        for index, output in enumerate(outputs):
+            on_result(index, (output["text"], None))
+        return
+    
+    for index, data in enumerate(inputs):
+        try:
+            on_result(index, (asr_pipeline(data)["text"], None))
+        except Exception as e:
+            on_result(index, e)
 
 
 async def transcribe_audio(
-    client: AsyncInferenceClient,
-    audio_data: bytes,
+    batcher: BatchedASR,
+    audio: AudioInput,
 ) -> dict:
-    """Transcribe audio using HuggingFace Whisper API.
+    """Transcribe audio using the local Whisper model.
     
     Args:
-        client: HuggingFace AsyncInferenceClient
-        audio_data: Raw audio bytes
+        batcher: Micro-batching queue in front of the local Whisper model
+        audio: Decoded 16 kHz samples or a file-like object at the start of the audio
         
     Returns:
         Dictionary with transcription result
@@ -68,47 +247,36 @@ async def transcribe_audio(
         ASRError: If transcription fails
     """
     try:
-        logger.info(f"Starting ASR with model: {settings.whisper_model}")
+        logger.info("Starting ASR with model: %s", settings.whisper_model)
         
-        # Call HuggingFace Inference API
-        result = await client.automatic_speech_recognition(
-            audio_data,
-            model=settings.whisper_model,
-        )
-        
-        # Handle different response formats
-        if isinstance(result, dict):
-            text = result.get("text", "")
-        elif isinstance(result, str):
-            text = result
-        else:
-            text = str(result)
+        # Coalesced with concurrent requests and run off the event loop
+        text, language = await batcher.submit(audio)
         
         if not text or not text.strip():
             raise ASRError("Transcription returned empty text")
         
-        logger.info(f"ASR completed successfully. Text length: {len(text)} chars")
+        logger.info("ASR completed successfully. Text length: %s chars", len(text))
         
         return {
             "text": text.strip(),
-            "language": "en",  # Whisper auto-detects but we default to English
+            "language": language or "en",
         }
         
     except Exception as e:
-        logger.error(f"ASR failed: {str(e)}")
+        logger.error("ASR failed: %s", e)
         if isinstance(e, ASRError):
             raise
         raise ASRError(f"Transcription failed: {str(e)}")
 
 
 async def process_audio_upload(
-    client: AsyncInferenceClient,
+    batcher: BatchedASR,
     file: UploadFile,
 ) -> dict:
     """Process uploaded audio file end-to-end.
     
     Args:
-        client: HuggingFace AsyncInferenceClient
+        batcher: Micro-batching queue in front of the local Whisper model
         file: Uploaded audio file
         
     Returns:
@@ -120,10 +288,34 @@ async def process_audio_upload(
     # Validate file
     await validate_audio_file(file)
     
-    # Read file contents
-    audio_data = await file.read()
-    
-    # Transcribe
-    result = await transcribe_audio(client, audio_data)
-    
-    return result
+    # Stream the upload into a spooled buffer: small files stay in memory and
+    # large ones roll over to disk, so no single full-size bytes copy is made
+    with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+        file_size = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            file_size += len(chunk)
+            if file_size > MAX_AUDIO_FILE_SIZE_BYTES:
+                raise ASRError(
+                    f"File too large. Maximum allowed: {settings.max_audio_file_size_mb}MB"
+                )
+            if file_size > SPOOL_MAX_SIZE:
+                # The spool has rolled over to disk, so writes are real file IO
+                await asyncio.to_thread(spool.write, chunk)
+            else:
+                spool.write(chunk)
+        
+        if file_size == 0:
+            raise ASRError("Empty audio file")
+        
+        logger.debug("Audio upload buffered: %s, size: %s bytes", file.filename, file_size)
+        
+        # Decode/resample here so it overlaps with the batch currently running
+        spool.seek(0)
+        async with ASR_INFLIGHT:
+            try:
+                audio = await asyncio.get_running_loop().run_in_executor(
+                    DECODE_EXECUTOR, decode_audio, spool
+                )
+            except sf.SoundFileError as e:
+                raise ASRError(f"Could not decode audio: {str(e)}")
+            return await transcribe_audio(batcher, audio)
@@ -0,0 +1,156 @@
+"""Dynamic micro-batching for ASR requests."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Called with (index, result or exception) as each input of a batch completes
+ResultCallback = Callable[[int, Any], None]
+# Takes a batch of audio inputs and reports one result per input via the callback
+BatchTranscribeFn = Callable[[list[Any], ResultCallback], None]
+
+
+class BatchedASR:
+    """Coalesce concurrent transcription requests into batched model calls.
+
+    Requests are placed on a shared queue. A background worker waits for the
+    first item, then keeps collecting until it has ``max_batch_size`` items or
+    ``window_ms`` has elapsed, and runs the whole batch on a dedicated thread,
+    so a long batch never occupies the event loop's default executor that
+    file and Redis I/O run on. Each request is resolved as soon as its own item finishes, not when the
+    whole batch does. With ``window_ms=0`` nothing waits: only requests that
+    queued up while the previous batch was running are grouped.
+    """
+
+    def __init__(
+        self,
+        transcribe_batch: BatchTranscribeFn,
+        max_batch_size: int,
+        window_ms: int,
+    ) -> None:
+        self._transcribe_batch = transcribe_batch
+        self._max_batch_size = max_batch_size
+        self._window = window_ms / 1000
+        self._queue: asyncio.Queue[tuple[Any, asyncio.Future]] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background worker is accepting requests."""
+        return self._worker is not None and not self._worker.done()
+
+    def start(self) -> None:
+        """Start the background batching worker on the running event loop."""
+        if not self.running:
+            # One batch runs at a time, so one thread is enough
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr-batch")
+            self._worker = asyncio.create_task(self._run(), name="asr-batcher")
+            logger.info(
+                "ASR batcher started (max batch: %s, window: %.0fms)",
+                self._max_batch_size,
+                self._window * 1000,
+            )
+
+    async def stop(self) -> None:
+        """Stop the worker and fail any requests still waiting in the queue."""
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+        # A batch already running cannot be interrupted; let it finish in the background
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("ASR batcher stopped"))
+
+        logger.info("ASR batcher stopped")
+
+    async def submit(self, audio: Any) -> Any:
+        """Queue audio for transcription and wait for its result.
+
+        Args:
+            audio: Audio input understood by the batch transcription function
+
+        Returns:
+            Result produced by the batch transcription function
+
+        Raises:
+            RuntimeError: If the batcher is not running
+        """
+        if not self.running:
+            raise RuntimeError("ASR batcher not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((audio, future))
+        return await future
+
+    async def _collect(self) -> list[tuple[Any, asyncio.Future]]:
+        """Wait for one request, then gather more until the batch or window is full."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self._window
+
+        while len(batch) < self._max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                # Window closed: still take whatever is already waiting
+                while len(batch) < self._max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+            except TimeoutError:
+                break
+
+        return batch
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any) -> None:
+        """Deliver one item's result unless its caller has gone away."""
+        if future.done():
+            return
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+    async def _run(self) -> None:
+        """Worker loop: collect a batch, transcribe it, resolve each future."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect()
+            audios = [audio for audio, _ in batch]
+            futures = [future for _, future in batch]
+
+            def on_result(index: int, result: Any, futures=futures) -> None:
+                # Runs in the worker thread; hand the result to the event loop
+                try:
+                    loop.call_soon_threadsafe(self._resolve, futures[index], result)
+                except RuntimeError:
+                    pass  # Event loop closed during shutdown
+
+            try:
+                await loop.run_in_executor(
+                    self._executor, self._transcribe_batch, audios, on_result
+                )
+            except asyncio.CancelledError:
+                for future in futures:
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.error("Batched transcription failed: %s", e)
+                for future in futures:
+                    self._resolve(future, e)
+
+            logger.debug("Transcribed batch of %s audio files", len(batch))
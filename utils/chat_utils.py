@@ -1,10 +1,20 @@
 """Chat utility functions using LangChain for CBT-style conversations."""
 
+import asyncio
 import logging
+from collections.abc import AsyncIterator, Sequence
 from typing import Any
 
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.runnables.history import RunnableWithMessageHistory
+import orjson
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    message_to_dict,
+    messages_from_dict,
+)
 from langchain_community.chat_message_histories import ChatMessageHistory
 
 from config.settings import settings
@@ -17,6 +27,74 @@ class ChatError(Exception):
     pass
 
 
+class WindowedChatMessageHistory(ChatMessageHistory):
+    """In-memory chat history that keeps only the most recent messages.
+    
+    Older messages are dropped as new ones are added, so both the stored
+    history and the prompt built from it stay bounded by ``max_messages``.
+    """
+    
+    max_messages: int = 2 * settings.conversation_memory_size
+    
+    def add_message(self, message: BaseMessage) -> None:
+        """Append a message and drop the oldest ones beyond the window."""
+        super().add_message(message)
+        overflow = len(self.messages) - self.max_messages
+        if overflow > 0:
+            del self.messages[:overflow]
+
+
+class RedisWindowedChatMessageHistory(BaseChatMessageHistory):
+    """Chat history kept in a Redis list, shared by every worker.
+    
+    Messages are pushed newest-first and the list is trimmed to
+    ``max_messages`` in the same round trip, so Redis holds exactly the window
+    sent to the LLM. Each write refreshes the key's idle TTL.
+    
+    The Redis client is synchronous and shared across histories; the async
+    ``aget_messages``/``aadd_messages`` methods inherited from
+    ``BaseChatMessageHistory`` run it in a worker thread.
+    """
+    
+    KEY_PREFIX = "chat_history:"
+    
+    def __init__(
+        self,
+        client: Any,
+        session_id: str,
+        max_messages: int = 2 * settings.conversation_memory_size,
+        ttl: int | None = None,
+    ) -> None:
+        self.client = client
+        self.key = f"{self.KEY_PREFIX}{session_id}"
+        self.max_messages = max_messages
+        self.ttl = ttl
+    
+    @property
+    def messages(self) -> list[BaseMessage]:
+        """Return the windowed history in chronological order."""
+        items = self.client.lrange(self.key, 0, self.max_messages - 1)
+        return messages_from_dict([orjson.loads(item) for item in reversed(items)])
+    
+    def add_message(self, message: BaseMessage) -> None:
+        """Store a single message."""
+        self.add_messages([message])
+    
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Push messages, trim to the window and refresh the TTL atomically."""
+        pipe = self.client.pipeline()
+        # orjson encodes straight to bytes, which redis-py sends as-is
+        pipe.lpush(self.key, *(orjson.dumps(message_to_dict(m)) for m in messages))
+        pipe.ltrim(self.key, 0, self.max_messages - 1)
+        if self.ttl:
+            pipe.expire(self.key, self.ttl)
+        pipe.execute()
+    
+    def clear(self) -> None:
+        """Delete the stored history."""
+        self.client.delete(self.key)
+
+
 # CBT-style prompt template for supportive journaling
 CBT_SYSTEM_PROMPT = """You are a supportive AI journaling assistant trained in Cognitive Behavioral Therapy (CBT) principles. Your role is to help users reflect on their thoughts and feelings through gentle, non-judgmental conversation.
 
@@ -29,17 +107,75 @@ Guidelines:
 - Keep responses concise (2-3 sentences ideal)
 - Reflect back what the user shares to show understanding"""
 
-CBT_PROMPT = ChatPromptTemplate.from_messages([
-    ("system", CBT_SYSTEM_PROMPT),
-    MessagesPlaceholder(variable_name="chat_history"),
-    ("human", "{input}"),
-])
+
+# Built once; messages are never mutated, so every prompt can share it
+_SYSTEM_MSG = SystemMessage(content=CBT_SYSTEM_PROMPT)
+
+
+def _with_cache_breakpoint(message: BaseMessage) -> BaseMessage:
+    """Return a copy of ``message`` marked ``cache_control: ephemeral``.
+    
+    The copy keeps the stored history untouched; only the prompt carries
+    the breakpoint.
+    """
+    content = message.content
+    if isinstance(content, str):
+        blocks: list[Any] = [{"type": "text", "text": content}]
+    else:
+        blocks = [
+            block if isinstance(block, dict) else {"type": "text", "text": block}
+            for block in content
+        ]
+    if not blocks:
+        return message
+    blocks[-1] = {**blocks[-1], "cache_control": {"type": "ephemeral"}}
+    return message.model_copy(update={"content": blocks})
+
+
+def _format(history: Sequence[BaseMessage], user_message: str) -> list[BaseMessage]:
+    """Assemble the prompt: system block, history window, then the new turn.
+    
+    Equivalent to formatting a system / history placeholder / human template,
+    without running the prompt template machinery on every turn.
+    
+    Anthropic only caches prefixes that end at an explicit breakpoint and
+    are at least 1024 tokens long (Sonnet/Opus), which the system prompt
+    alone never reaches. The breakpoint therefore goes on the last history
+    message, so the system prompt plus the conversation so far is cached
+    once it grows past that minimum and reused on the next turn. Once the
+    window is full the oldest exchange drops every turn and no prefix is
+    ever repeated, so the breakpoint is then left off rather than paying
+    the cache-write premium for nothing. Other providers cache shared
+    prefixes automatically.
+    """
+    # The next turn reuses this prefix only if this turn's exchange still fits
+    reused = len(history) + 2 <= 2 * settings.conversation_memory_size
+    if history and reused and settings.llm_provider == "anthropic":
+        history = [*history[:-1], _with_cache_breakpoint(history[-1])]
+    return [_SYSTEM_MSG, *history, HumanMessage(content=user_message)]
+
+
+def _window(messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+    """Keep the last ``CONVERSATION_MEMORY_SIZE`` exchanges of ``messages``."""
+    return list(messages[-2 * settings.conversation_memory_size:])
+
+
+async def _history_window(memory: BaseChatMessageHistory) -> list[BaseMessage]:
+    """Snapshot the history window sent with a turn.
+    
+    Only the last ``CONVERSATION_MEMORY_SIZE`` exchanges are sent, keeping
+    prompt size bounded for histories not created with a window. The slice
+    is a copy, so adding this turn's messages cannot alter the prompt
+    mid-request.
+    """
+    return _window(await memory.aget_messages())
 
 
 async def generate_chat_response(
     llm: Any,
-    memory: ChatMessageHistory,
+    memory: BaseChatMessageHistory,
     user_message: str,
+    chat_history: Sequence[BaseMessage] | None = None,
 ) -> str:
     """Generate a CBT-style response to user's message.
     
@@ -47,6 +183,8 @@ async def generate_chat_response(
         llm: LangChain LLM instance
         memory: Conversation memory for context
         user_message: User's diary entry or message
+        chat_history: History snapshot already read by the caller; read
+            from ``memory`` when omitted
         
     Returns:
         AI-generated supportive response
@@ -55,45 +193,168 @@ async def generate_chat_response(
         ChatError: If response generation fails
     """
     try:
-        logger.info(f"Generating chat response for message length: {len(user_message)} chars")
-        
-        # Create chain with prompt
-        chain = CBT_PROMPT | llm
-        
-        # Get chat history from memory
-        chat_history = memory.messages
+        logger.info("Generating chat response for message length: %s chars", len(user_message))
         
-        # Generate response
-        response = await chain.ainvoke({
-            "input": user_message,
-            "chat_history": chat_history
-        })
-        
-        # Extract response text from AIMessage
-        if hasattr(response, 'content'):
-            response_text = response.content
+        if chat_history is None:
+            window = await _history_window(memory)
         else:
-            response_text = str(response)
+            window = _window(chat_history)
+        
+        # Generate response; a chat model always returns an AIMessage
+        response = await llm.ainvoke(_format(window, user_message))
+        # Stripped before storing so the history matches a cache hit's
+        response_text = (response.content or "").strip()
         
-        if not response_text or not response_text.strip():
+        if not response_text:
             raise ChatError("Generated response is empty")
         
         # Add messages to memory
-        memory.add_user_message(user_message)
-        memory.add_ai_message(response_text)
+        await memory.aadd_messages([
+            HumanMessage(content=user_message),
+            AIMessage(content=response_text),
+        ])
+        
+        logger.info("Chat response generated successfully. Length: %s chars", len(response_text))
+        
+        return response_text
+        
+    except Exception as e:
+        logger.error("Chat generation failed: %s", e)
+        if isinstance(e, ChatError):
+            raise
+        raise ChatError(f"Failed to generate response: {str(e)}")
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Extract the text of a streamed message chunk.
+    
+    Most providers stream plain strings; Anthropic streams content blocks.
+    """
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") for block in content if isinstance(block, dict)
+    )
+
+
+async def generate_chat_response_stream(
+    llm: Any,
+    memory: BaseChatMessageHistory,
+    user_message: str,
+) -> AsyncIterator[str]:
+    """Stream a CBT-style response to user's message as it is generated.
+    
+    The turn is written to memory only after the full response has arrived,
+    so an aborted stream leaves the conversation unchanged.
+    
+    Args:
+        llm: LangChain LLM instance
+        memory: Conversation memory for context
+        user_message: User's diary entry or message
         
-        logger.info(f"Chat response generated successfully. Length: {len(response_text)} chars")
+    Yields:
+        Response text fragments in arrival order
         
-        return response_text.strip()
+    Raises:
+        ChatError: If response generation fails
+    """
+    try:
+        logger.info("Streaming chat response for message length: %s chars", len(user_message))
+        
+        chat_history = await _history_window(memory)
+        chunks = []
+        
+        async for chunk in llm.astream(_format(chat_history, user_message)):
+            text = _chunk_text(chunk)
+            if text:
+                chunks.append(text)
+                yield text
+        
+        # Stored stripped, like the other paths, so histories fingerprint alike
+        response_text = "".join(chunks).strip()
+        if not response_text:
+            raise ChatError("Generated response is empty")
+        
+        await memory.aadd_messages([
+            HumanMessage(content=user_message),
+            AIMessage(content=response_text),
+        ])
+        
+        logger.info("Chat response streamed successfully. Length: %s chars", len(response_text))
         
     except Exception as e:
-        logger.error(f"Chat generation failed: {str(e)}")
+        logger.error("Chat streaming failed: %s", e)
         if isinstance(e, ChatError):
             raise
         raise ChatError(f"Failed to generate response: {str(e)}")
 
 
-def clear_conversation_memory(memory: ChatMessageHistory) -> None:
+async def generate_chat_responses_batch(
+    llms: Sequence[Any],
+    memories: Sequence[BaseChatMessageHistory],
+    user_messages: Sequence[str],
+) -> list[str]:
+    """Generate CBT-style responses for several conversations at once.
+    
+    All turns are sent to the provider concurrently (bounded by
+    ``LLM_MAX_CONCURRENCY``) instead of as separate request/response round
+    trips. This is what ``llm.abatch`` does, but each turn keeps its own
+    per-user model binding.
+    
+    Args:
+        llms: LangChain LLM instance for each turn, aligned with ``memories``
+        memories: Conversation memory for each turn, one per distinct user
+        user_messages: User message for each turn, aligned with ``memories``
+        
+    Returns:
+        AI-generated responses in input order
+        
+    Raises:
+        ChatError: If the inputs are misaligned or any generation fails
+    """
+    if not len(llms) == len(memories) == len(user_messages):
+        raise ChatError("Each message needs exactly one model and conversation memory")
+    
+    try:
+        logger.info("Generating %s chat responses in one batch", len(user_messages))
+        
+        histories = await asyncio.gather(*(_history_window(memory) for memory in memories))
+        prompts = [
+            _format(history, message) for history, message in zip(histories, user_messages)
+        ]
+        
+        limit = asyncio.Semaphore(settings.llm_max_concurrency)
+        
+        async def invoke(llm: Any, prompt: list[BaseMessage]) -> Any:
+            async with limit:
+                return await llm.ainvoke(prompt)
+        
+        responses = await asyncio.gather(*(
+            invoke(llm, prompt) for llm, prompt in zip(llms, prompts)
+        ))
+        
+        # Stripped before storing so histories match those from /chat
+        response_texts = [(response.content or "").strip() for response in responses]
+        if not all(response_texts):
+            raise ChatError("Generated response is empty")
+        
+        # Validated first, so a failed batch leaves every conversation unchanged
+        await asyncio.gather(*(
+            memory.aadd_messages([HumanMessage(content=message), AIMessage(content=text)])
+            for memory, message, text in zip(memories, user_messages, response_texts)
+        ))
+        
+        return response_texts
+        
+    except Exception as e:
+        logger.error("Batched chat generation failed: %s", e)
+        if isinstance(e, ChatError):
+            raise
+        raise ChatError(f"Failed to generate responses: {str(e)}")
+
+
+def clear_conversation_memory(memory: BaseChatMessageHistory) -> None:
     """Clear conversation memory for a fresh start.
     
     Args:
@@ -103,7 +364,7 @@ def clear_conversation_memory(memory: ChatMessageHistory) -> None:
     logger.debug("Conversation memory cleared")
 
 
-def get_conversation_history(memory: ChatMessageHistory) -> list[dict]:
+def get_conversation_history(memory: BaseChatMessageHistory) -> list[dict]:
     """Get conversation history from memory.
     
     Args:
@@ -116,5 +377,5 @@ def get_conversation_history(memory: ChatMessageHistory) -> list[dict]:
         messages = memory.messages
         return [{"role": msg.type, "content": msg.content} for msg in messages]
     except Exception as e:
-        logger.warning(f"Failed to load conversation history: {e}")
+        logger.warning("Failed to load conversation history: %s", e)
         return []
\ No newline at end of file
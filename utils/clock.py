@@ -0,0 +1,50 @@
+"""Cached UTC clock for response timestamps."""
+
+import asyncio
+from datetime import UTC, datetime
+
+# Response timestamps only need to be accurate to this many seconds
+REFRESH_INTERVAL = 0.25
+
+_now: datetime = datetime.now(UTC)
+_task: asyncio.Task | None = None
+
+
+def utcnow() -> datetime:
+    """Return the current UTC time, accurate to ``REFRESH_INTERVAL``.
+
+    Reads a timestamp refreshed by a background task, so the hot path is a
+    single global load. Falls back to a real clock read when the refresher is
+    not running (e.g. in scripts or before startup).
+    """
+    if _task is None:
+        return datetime.now(UTC)
+    return _now
+
+
+async def _refresh() -> None:
+    """Refresh the cached timestamp until cancelled."""
+    global _now
+
+    while True:
+        _now = datetime.now(UTC)
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+
+def start() -> None:
+    """Start the background refresher on the running event loop."""
+    global _now, _task
+
+    if _task is None:
+        _now = datetime.now(UTC)
+        _task = asyncio.create_task(_refresh(), name="clock-refresh")
+
+
+async def stop() -> None:
+    """Stop the background refresher."""
+    global _task
+
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
@@ -1,24 +1,169 @@
 """Dependency injection functions for FastAPI endpoints."""
 
+import asyncio
+import importlib
 import logging
-from typing import Annotated, Any, Generator
+from functools import partial
+from typing import Annotated, Any
+from weakref import WeakValueDictionary
 
+import httpx
+from cachetools import TTLCache
 from fastapi import Depends
+from faster_whisper import BatchedInferencePipeline, WhisperModel
 from huggingface_hub import AsyncInferenceClient
-from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.chat_history import BaseChatMessageHistory
 
 from config.settings import settings
+from utils.asr_utils import transcribe_batch, transcribe_batch_onnx
+from utils.batching import BatchedASR, BatchTranscribeFn
+from utils.chat_utils import RedisWindowedChatMessageHistory, WindowedChatMessageHistory
 
 logger = logging.getLogger(__name__)
 
 _hf_client: AsyncInferenceClient | None = None
+_http_client: httpx.AsyncClient | None = None
+_history_redis = None
+_asr_model: Any = None
+_asr_batcher: BatchedASR | None = None
 _llm_chain = None
-_conversation_memory: dict[str, ChatMessageHistory] = {}
+_llm_provider: str | None = None
+
+# LLM provider -> (module, chat model class), imported lazily by _create_llm
+LLM_PROVIDERS: dict[str, tuple[str, str]] = {
+    "openai": ("langchain_openai", "ChatOpenAI"),
+    "anthropic": ("langchain_anthropic", "ChatAnthropic"),
+    "germini": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+}
+
+# Pool limits for the shared HTTP/2 client; one connection multiplexes many streams
+HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=50)
+
+
+class _ConversationMemoryCache(TTLCache):
+    """TTL cache that creates a history handle on first access for a user."""
+    
+    def __missing__(self, user_id: str) -> BaseChatMessageHistory:
+        if _history_redis is not None:
+            # Only a handle; the messages themselves live in Redis
+            memory = RedisWindowedChatMessageHistory(
+                _history_redis, user_id, ttl=settings.memory_idle_ttl
+            )
+        else:
+            memory = WindowedChatMessageHistory()
+        self[user_id] = memory
+        logger.debug("Created new conversation memory for user: %s", user_id)
+        return memory
+
+
+# One lock per active user; entries vanish once no turn holds the lock
+_conversation_locks: WeakValueDictionary[str, asyncio.Lock] = WeakValueDictionary()
+
+# Idle users expire after MEMORY_IDLE_TTL; the least recently active user is
+# evicted early if MAX_TRACKED_USERS is reached
+_conversation_memory: _ConversationMemoryCache = _ConversationMemoryCache(
+    maxsize=settings.max_tracked_users,
+    ttl=settings.memory_idle_ttl,
+)
+
+
+def _load_asr_backend() -> tuple[Any, BatchTranscribeFn]:
+    """Load the configured local Whisper backend.
+    
+    Returns:
+        Tuple of (model, batch transcription function for BatchedASR)
+    """
+    if settings.asr_backend == "onnx":
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+        from transformers import AutoProcessor, pipeline
+        
+        # Expects a model exported/fused by scripts/optimize_whisper.py
+        model = ORTModelForSpeechSeq2Seq.from_pretrained(
+            settings.whisper_onnx_path,
+            provider=settings.whisper_onnx_provider,
+        )
+        processor = AutoProcessor.from_pretrained(settings.whisper_onnx_path)
+        # Recordings over 30 s would otherwise switch Whisper to long-form
+        # generation, which requires timestamps; chunks of every file in a
+        # micro-batch are run through the encoder together instead
+        asr_pipeline = pipeline(
+            "automatic-speech-recognition",
+            model=model,
+            tokenizer=processor.tokenizer,
+            feature_extractor=processor.feature_extractor,
+            chunk_length_s=30,
+        )
+        logger.info(
+            "Whisper ONNX model loaded: %s (%s)",
+            settings.whisper_onnx_path,
+            settings.whisper_onnx_provider,
+        )
+        return asr_pipeline, partial(transcribe_batch_onnx, asr_pipeline)
+    
+    # INT8 CTranslate2 model
+    model = WhisperModel(
+        settings.whisper_model,
+        device=settings.whisper_device,
+        compute_type=settings.whisper_compute_type,
+    )
+    logger.info(
+        "Whisper model loaded: %s (%s/%s)",
+        settings.whisper_model,
+        settings.whisper_device,
+        settings.whisper_compute_type,
+    )
+    return model, partial(transcribe_batch, BatchedInferencePipeline(model=model))
+
+
+def _resolve_llm_provider() -> str:
+    """Return the configured LLM provider, or openai if it has no integration."""
+    provider = settings.llm_provider
+    if provider not in LLM_PROVIDERS:
+        logger.warning("No LangChain integration for %s, falling back to openai", provider)
+        provider = "openai"
+    return provider
+
+
+def _create_llm(provider: str) -> Any:
+    """Instantiate the chat model for a provider.
+    
+    Only the selected provider's LangChain integration is imported. The
+    shared HTTP/2 pool is created only for OpenAI, the one integration that
+    accepts an httpx client.
+    
+    Args:
+        provider: Key of ``LLM_PROVIDERS``
+    
+    Returns:
+        LangChain chat model instance
+    """
+    global _http_client
+    
+    module_name, class_name = LLM_PROVIDERS[provider]
+    llm_cls = getattr(importlib.import_module(module_name), class_name)
+    
+    kwargs: dict[str, Any] = {
+        "model": settings.llm_model,
+        "temperature": settings.llm_temperature,
+        "max_tokens": settings.llm_max_tokens,
+        "api_key": settings.llm_api_key,
+    }
+    if provider == "openai":
+        # Shared pool: requests reuse warm TLS connections and multiplex over HTTP/2
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=HTTP_LIMITS,
+            timeout=settings.hf_timeout,
+        )
+        kwargs["http_async_client"] = _http_client
+    
+    return llm_cls(**kwargs)
 
 
 def initialize_clients() -> None:
-    """Initialize HuggingFace and LLM clients at startup."""
-    global _hf_client, _llm_chain
+    """Initialize HuggingFace, Whisper and LLM clients at startup."""
+    global _hf_client, _history_redis, _asr_model, _asr_batcher
+    global _llm_chain, _llm_provider
     
     try:
         _hf_client = AsyncInferenceClient(
@@ -27,52 +172,57 @@ def initialize_clients() -> None:
         )
         logger.info("HuggingFace AsyncInferenceClient initialized")
         
+        # Local Whisper avoids an HTTP round trip per ASR request. Loaded here,
+        # in each worker's lifespan, never before a fork: CTranslate2 and ONNX
+        # Runtime start their thread pools when the model is built, and those
+        # threads do not exist in a forked child, so inference would hang
+        _asr_model, transcribe_fn = _load_asr_backend()
+        
+        # Started from the app lifespan, where an event loop is running. Only
+        # the ONNX pipeline runs several files through the encoder together;
+        # faster-whisper gains nothing from waiting for more requests
+        _asr_batcher = BatchedASR(
+            transcribe_fn,
+            max_batch_size=settings.asr_batch_size,
+            window_ms=settings.asr_batch_window_ms if settings.asr_backend == "onnx" else 0,
+        )
+        
+        # Conversations shared across workers when Redis is configured
+        if settings.redis_url:
+            import redis
+            
+            _history_redis = redis.Redis.from_url(settings.redis_url)
+            logger.info("Redis conversation memory enabled")
+        
         # Initialize LLM (supports multiple providers via LangChain)
-        if settings.llm_provider == "germini":
-            from langchain_google_genai import ChatGoogleGenerativeAI
-            _llm_chain = ChatGoogleGenerativeAI(
-                model=settings.llm_model,
-                temperature=settings.llm_temperature,
-                max_tokens=settings.llm_max_tokens,
-                api_key=settings.llm_api_key,
-            )
-        elif settings.llm_provider == "openai":
-            from langchain_openai import ChatOpenAI
-            _llm_chain = ChatOpenAI(
-                model=settings.llm_model,
-                temperature=settings.llm_temperature,
-                max_tokens=settings.llm_max_tokens,
-                api_key=settings.llm_api_key,
-            )
-        elif settings.llm_provider == "anthropic":
-            from langchain_anthropic import ChatAnthropic
-            _llm_chain = ChatAnthropic(
-                model=settings.llm_model,
-                temperature=settings.llm_temperature,
-                max_tokens=settings.llm_max_tokens,
-                api_key=settings.llm_api_key,
-            )
-        else:
-            _llm_chain = ChatOpenAI(
-                model=settings.llm_model,
-                temperature=settings.llm_temperature,
-                max_tokens=settings.llm_max_tokens,
-                api_key=settings.llm_api_key,
-            )
+        _llm_provider = _resolve_llm_provider()
+        _llm_chain = _create_llm(_llm_provider)
         
-        logger.info(f"LLM initialized: {settings.llm_provider}/{settings.llm_model}")
+        logger.info("LLM initialized: %s/%s", settings.llm_provider, settings.llm_model)
         
     except Exception as e:
-        logger.error(f"Failed to initialize clients: {e}")
+        logger.error("Failed to initialize clients: %s", e)
         raise
 
 
-def cleanup_clients() -> None:
+async def cleanup_clients() -> None:
     """Cleanup resources at shutdown."""
-    global _hf_client, _llm_chain, _conversation_memory
+    global _hf_client, _http_client, _history_redis, _asr_model, _asr_batcher
+    global _llm_chain, _llm_provider
+    
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    
+    if _history_redis is not None:
+        _history_redis.close()
+        _history_redis = None
     
     _hf_client = None
+    _asr_model = None
+    _asr_batcher = None
     _llm_chain = None
+    _llm_provider = None
     _conversation_memory.clear()
     logger.info("Cleaned up global resources")
 
@@ -91,6 +241,34 @@ def get_hf_client() -> AsyncInferenceClient:
     return _hf_client
 
 
+def get_asr_model() -> Any:
+    """Dependency to get the local Whisper model instance.
+    
+    Returns:
+        WhisperModel, or the ONNX Runtime pipeline when ``ASR_BACKEND=onnx``
+        
+    Raises:
+        RuntimeError: If model not initialized
+    """
+    if _asr_model is None:
+        raise RuntimeError("Whisper model not initialized")
+    return _asr_model
+
+
+def get_asr_batcher() -> BatchedASR:
+    """Dependency to get the ASR micro-batching queue.
+    
+    Returns:
+        BatchedASR instance
+        
+    Raises:
+        RuntimeError: If batcher not initialized
+    """
+    if _asr_batcher is None:
+        raise RuntimeError("ASR batcher not initialized")
+    return _asr_batcher
+
+
 def get_llm():
     """Dependency to get LLM instance.
     
@@ -105,22 +283,85 @@ def get_llm():
     return _llm_chain
 
 
-def get_conversation_memory(user_id: str = "default") -> ChatMessageHistory:
+def get_user_llm(user_id: str) -> Any:
+    """Get the LLM for one user's chat turns.
+    
+    OpenAI caches prompt prefixes per ``prompt_cache_key``. Only a user's own
+    conversation repeats a prefix long enough to be cached (1024 tokens; the
+    system prompt alone is far shorter), so each user gets their own key.
+    This also spreads traffic over many keys instead of overflowing the
+    per-key request rate. Other providers get the model unchanged.
+    
+    Args:
+        user_id: User identifier, used as the cache key
+        
+    Returns:
+        LLM instance, bound to the user's cache key for OpenAI
+        
+    Raises:
+        RuntimeError: If LLM not initialized
+    """
+    llm = get_llm()
+    if _llm_provider == "openai":
+        # extra_body works with every supported openai SDK version
+        return llm.bind(extra_body={"prompt_cache_key": user_id})
+    return llm
+
+
+def get_conversation_memory(user_id: str = "default") -> BaseChatMessageHistory:
     """Get or create conversation memory for a user.
     
+    History is kept as a plain message list rather than a summarizing
+    memory, limited to the last ``CONVERSATION_MEMORY_SIZE`` exchanges.
+    Until the window fills the history is append-only, so the prompt prefix
+    stays stable and benefits from the providers' automatic prompt caching;
+    after that, dropping the oldest exchange keeps prompt size bounded.
+    Summaries or MemGPT-style paging would rewrite the prefix on every turn
+    and only pay off for conversations that exceed the context window.
+    
+    At most ``MAX_TRACKED_USERS`` histories are kept in-process; the least
+    recently active user is evicted first, and histories idle for longer
+    than ``MEMORY_IDLE_TTL`` seconds are dropped. When ``REDIS_URL`` is set
+    the messages live in Redis instead, so any worker can serve any user and
+    conversations survive restarts; the in-process cache then only holds
+    lightweight handles.
+    
     Args:
         user_id: User identifier for memory isolation
         
     Returns:
-        ChatMessageHistory instance
+        Chat message history for the user
     """
-    if user_id not in _conversation_memory:
-        _conversation_memory[user_id] = ChatMessageHistory()
-        logger.debug(f"Created new conversation memory for user: {user_id}")
+    # No await between lookup and insert, so this is atomic on the event loop
+    memory = _conversation_memory[user_id]
+    # TTLCache expiry counts from insertion; re-inserting makes it an idle timeout
+    _conversation_memory[user_id] = memory
+    
+    return memory
+
+
+def get_conversation_lock(user_id: str = "default") -> asyncio.Lock:
+    """Get the lock that serializes chat turns for a user.
+    
+    Creating the history is already atomic on the event loop, but a turn
+    awaits the LLM between reading the history and appending to it. Two
+    overlapping turns for one user (e.g. a double-posted message) would both
+    be conditioned on the same history and interleave their messages; the
+    caller holds this lock for the whole turn to prevent that.
     
-    return _conversation_memory[user_id]
+    Args:
+        user_id: User identifier for memory isolation
+        
+    Returns:
+        asyncio.Lock shared by all in-flight turns of the user
+    """
+    lock = _conversation_locks.get(user_id)
+    if lock is None:
+        lock = _conversation_locks[user_id] = asyncio.Lock()
+    return lock
 
 
 # Type aliases for dependency injection
 HFClient = Annotated[AsyncInferenceClient, Depends(get_hf_client)]
+ASRBatcher = Annotated[BatchedASR, Depends(get_asr_batcher)]
 LLM = Annotated[Any, Depends(get_llm)]
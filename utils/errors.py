@@ -0,0 +1,56 @@
+"""Shared error handling for API endpoints."""
+
+import functools
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def handle_errors(
+    expected_exc: type[Exception],
+    status_code: int,
+    fallback_message: str,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Map endpoint exceptions to HTTP errors.
+
+    ``expected_exc`` (validation/processing errors raised by the utils layer)
+    becomes ``status_code`` with the exception message as detail. Any other
+    exception becomes a 500 with ``fallback_message`` so internals are not
+    leaked. ``HTTPException`` raised by the endpoint passes through unchanged.
+
+    Args:
+        expected_exc: Exception type raised for client-side errors
+        status_code: HTTP status code for ``expected_exc``
+        fallback_message: Detail returned for unexpected errors
+
+    Returns:
+        Decorator for ``async def`` endpoint functions
+    """
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        # functools.wraps keeps the signature FastAPI inspects for dependencies
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            try:
+                return await func(*args, **kwargs)
+            except HTTPException:
+                raise
+            except expected_exc as e:
+                logger.warning("%s validation error: %s", func.__name__, e)
+                raise HTTPException(status_code=status_code, detail=str(e))
+            except Exception as e:
+                logger.error("%s failed: %s", func.__name__, e)
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=fallback_message,
+                )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,124 @@
+"""Two-tier cache for LLM chat responses (in-process TTL cache backed by Redis)."""
+
+import logging
+import re
+from collections.abc import Awaitable, Callable, Sequence
+
+import xxhash
+from cachetools import TTLCache
+from langchain_core.messages import BaseMessage
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "llm_cache:"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_local_cache: TTLCache[int, str] = TTLCache(
+    maxsize=settings.llm_cache_size,
+    ttl=settings.llm_cache_ttl,
+)
+_redis = None
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a user message so trivially different resends share a cache entry."""
+    return _WHITESPACE_RE.sub(" ", message.strip().lower())
+
+
+def history_fingerprint(messages: Sequence[BaseMessage]) -> int:
+    """Hash the conversation history that the response will be conditioned on."""
+    digest = xxhash.xxh3_64()
+    for message in messages:
+        digest.update(f"{message.type}\0{message.content}\0".encode())
+    return digest.intdigest()
+
+
+def make_cache_key(message: str, history: Sequence[BaseMessage]) -> int:
+    """Build the cache key for a chat turn.
+
+    The key covers the model configuration, the normalized message and the
+    history fingerprint. Identical conversations share an entry regardless of
+    which user sent them, which is what makes common openers cacheable.
+
+    Args:
+        message: Raw user message
+        history: Conversation history passed to the LLM
+
+    Returns:
+        64-bit xxh3 cache key
+    """
+    raw = (
+        f"{settings.llm_provider}|{settings.llm_model}|{settings.llm_temperature}|"
+        f"{normalize_message(message)}|{history_fingerprint(history)}"
+    )
+    return xxhash.xxh3_64_intdigest(raw.encode())
+
+
+def _get_redis():
+    """Lazily create the shared Redis client if ``REDIS_URL`` is configured."""
+    global _redis
+
+    if _redis is None and settings.redis_url:
+        import redis.asyncio as redis
+
+        _redis = redis.from_url(settings.redis_url, decode_responses=True)
+        logger.info("Redis LLM cache enabled")
+    return _redis
+
+
+async def get_or_compute(
+    key: int,
+    compute_fn: Callable[[], Awaitable[str]],
+    ttl: int = settings.llm_cache_ttl,
+) -> tuple[str, bool]:
+    """Return a cached response or compute and store it.
+
+    Redis errors are logged and treated as a miss so the cache can never take
+    the chat endpoint down.
+
+    Args:
+        key: Cache key from ``make_cache_key``
+        compute_fn: Coroutine factory producing the response on a miss
+        ttl: Redis expiry in seconds
+
+    Returns:
+        Tuple of (response_text, cache_hit)
+    """
+    value = _local_cache.get(key)
+    if value is not None:
+        return value, True
+
+    redis_key = f"{REDIS_KEY_PREFIX}{key:016x}"
+    client = _get_redis()
+    if client is not None:
+        try:
+            value = await client.get(redis_key)
+        except Exception as e:
+            logger.warning("Redis cache lookup failed: %s", e)
+        if value is not None:
+            _local_cache[key] = value
+            return value, True
+
+    value = await compute_fn()
+    _local_cache[key] = value
+
+    if client is not None:
+        try:
+            await client.set(redis_key, value, ex=ttl)
+        except Exception as e:
+            logger.warning("Redis cache write failed: %s", e)
+
+    return value, False
+
+
+async def close() -> None:
+    """Close the Redis connection pool, if one was opened."""
+    global _redis
+
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+    _local_cache.clear()
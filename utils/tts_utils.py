@@ -1,11 +1,18 @@
 """TTS (Text-to-Speech) utility functions."""
 
+import asyncio
 import hashlib
 import logging
 import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from weakref import WeakValueDictionary
 
+import aiofiles
+import aiofiles.os
 from huggingface_hub import AsyncInferenceClient
 
 from config.settings import settings
@@ -15,6 +22,25 @@ logger = logging.getLogger(__name__)
 # Temporary directory for audio files
 TEMP_AUDIO_DIR = Path("temp_audio")
 TEMP_AUDIO_DIR.mkdir(exist_ok=True)
+# In-progress writes; renamed onto audio_<hash>.wav once complete
+PARTIAL_SUFFIX = ".part"
+# Partials older than this are left over from a crashed writer, not in flight
+STALE_PARTIAL_SECONDS = 600
+
+# Caps in-flight HuggingFace TTS calls so bursts overlap without tripping rate limits
+TTS_SEMAPHORE = asyncio.Semaphore(settings.tts_concurrency)
+
+
+# One lock per audio hash so concurrent requests for the same text share a single
+# TTS call; entries disappear once no request holds the lock
+_TTS_LOCKS: WeakValueDictionary[str, asyncio.Lock] = WeakValueDictionary()
+
+# Cached audio in least- to most-recently-served order: filename -> (path, size)
+_AUDIO_LRU: OrderedDict[str, tuple[Path, int]] = OrderedDict()
+_AUDIO_LRU_BYTES = 0
+
+# Rough speech rate used to estimate audio duration from text length
+CHARS_PER_SECOND = 15
 
 
 class TTSError(Exception):
@@ -22,6 +48,15 @@ class TTSError(Exception):
     pass
 
 
+@dataclass(slots=True, frozen=True)
+class TTSArtifact:
+    """Generated audio file with metadata computed once after writing."""
+
+    path: Path
+    stat_result: os.stat_result
+    duration: float
+
+
 def validate_text_for_tts(text: str) -> None:
     """Validate text before TTS conversion.
     
@@ -31,29 +66,131 @@ def validate_text_for_tts(text: str) -> None:
     Raises:
         TTSError: If validation fails
     """
-    if not text or not text.strip():
+    # isspace() scans in C without allocating a stripped copy
+    if not text or text.isspace():
         raise TTSError("Text cannot be empty")
     
-    if len(text) > 2000:
-        raise TTSError(f"Text too long: {len(text)} chars. Maximum: 2000 chars")
+    text_length = len(text)
+    if text_length > 2000:
+        raise TTSError(f"Text too long: {text_length} chars. Maximum: 2000 chars")
     
-    logger.debug(f"Text validated for TTS: {len(text)} chars")
+    logger.debug("Text validated for TTS: %s chars", text_length)
 
 
 def generate_audio_filename(text: str) -> str:
-    """Generate a unique filename for audio based on text hash.
+    """Generate a deterministic filename for audio based on text hash.
+    
+    The TTS model is part of the hash, so switching models does not serve
+    audio cached from the previous one.
     
     Args:
         text: Input text
         
     Returns:
-        Unique filename with .wav extension
+        Filename with .wav extension, stable for the same model and text
     """
-    # Create hash of text for unique filename
-    text_hash = hashlib.md5(text.encode()).hexdigest()[:12]
+    # 128-bit BLAKE2b: faster than MD5 and collision-safe as a cache key
+    text_hash = hashlib.blake2b(
+        f"{settings.tts_model}\0{text}".encode(), digest_size=16
+    ).hexdigest()
     return f"audio_{text_hash}.wav"
 
 
+async def _cached_audio_stat(filename: str, filepath: Path) -> os.stat_result | None:
+    """Return the stat of previously generated audio, or None if absent."""
+    try:
+        return await aiofiles.os.stat(filepath)
+    except FileNotFoundError:
+        # Evicted by another worker sharing the directory
+        _forget_audio(filename)
+        return None
+
+
+async def _remember_audio(filename: str, filepath: Path, size: int) -> None:
+    """Mark audio as most recently served, then enforce the cache budget."""
+    global _AUDIO_LRU_BYTES
+    
+    previous = _AUDIO_LRU.get(filename)
+    if previous is None:
+        _AUDIO_LRU[filename] = (filepath, size)
+        _AUDIO_LRU_BYTES += size
+    else:
+        _AUDIO_LRU.move_to_end(filename)
+    
+    await _evict_until(settings.tts_cache_max_bytes)
+
+
+def _forget_audio(filename: str) -> None:
+    """Drop an entry whose file no longer exists."""
+    global _AUDIO_LRU_BYTES
+    
+    entry = _AUDIO_LRU.pop(filename, None)
+    if entry is not None:
+        _AUDIO_LRU_BYTES -= entry[1]
+
+
+async def _evict_until(max_bytes: int) -> None:
+    """Delete least recently served audio until the cache fits ``max_bytes``.
+    
+    The most recent entry is always kept so a file larger than the whole
+    budget can still be served once.
+    """
+    global _AUDIO_LRU_BYTES
+    
+    while _AUDIO_LRU_BYTES > max_bytes and len(_AUDIO_LRU) > 1:
+        _, (filepath, size) = _AUDIO_LRU.popitem(last=False)
+        _AUDIO_LRU_BYTES -= size
+        await cleanup_audio_file(filepath)
+
+
+def _scan_cached_audio() -> list[tuple[float, str, int]]:
+    """List cached audio as (mtime, filename, size), deleting stale partial files."""
+    stale_before = time.time() - STALE_PARTIAL_SECONDS
+    files = []
+    with os.scandir(TEMP_AUDIO_DIR) as entries:
+        for entry in entries:
+            if not entry.name.startswith("audio_"):
+                continue
+            if entry.name.endswith(PARTIAL_SUFFIX):
+                # Other workers may be mid-write; only reap abandoned partials
+                try:
+                    if entry.stat(follow_symlinks=False).st_mtime < stale_before:
+                        os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+                continue
+            if not entry.name.endswith(".wav"):
+                continue
+            try:
+                stat_result = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            files.append((stat_result.st_mtime, entry.name, stat_result.st_size))
+    return files
+
+
+async def index_cached_audio() -> None:
+    """Load audio left in ``TEMP_AUDIO_DIR`` into the LRU, oldest first.
+    
+    Called once per worker at startup so files from a previous run count
+    toward the budget. Partial files older than ``STALE_PARTIAL_SECONDS``
+    are deleted; newer ones may belong to another worker's in-flight write.
+    """
+    try:
+        # The directory scan is a burst of syscalls; run it in a worker thread
+        files = await asyncio.to_thread(_scan_cached_audio)
+        
+        for _, name, size in sorted(files):
+            await _remember_audio(name, TEMP_AUDIO_DIR / name, size)
+        
+        logger.info(
+            "Indexed %s cached audio files (%s bytes)", len(_AUDIO_LRU), _AUDIO_LRU_BYTES
+        )
+        
+    except Exception as e:
+        logger.warning("Failed to index cached audio files: %s", e)
+
+
 async def text_to_speech(
     client: AsyncInferenceClient,
     text: str,
@@ -71,23 +208,24 @@ async def text_to_speech(
         TTSError: If TTS conversion fails
     """
     try:
-        logger.info(f"Starting TTS with model: {settings.tts_model}")
+        logger.info("Starting TTS with model: %s", settings.tts_model)
         
         # Call HuggingFace Inference API
-        audio_bytes = await client.text_to_speech(
-            text,
-            model=settings.tts_model,
-        )
+        async with TTS_SEMAPHORE:
+            audio_bytes = await client.text_to_speech(
+                text,
+                model=settings.tts_model,
+            )
         
         if not audio_bytes:
             raise TTSError("TTS returned empty audio")
         
-        logger.info(f"TTS completed successfully. Audio size: {len(audio_bytes)} bytes")
+        logger.info("TTS completed successfully. Audio size: %s bytes", len(audio_bytes))
         
         return audio_bytes
         
     except Exception as e:
-        logger.error(f"TTS failed: {str(e)}")
+        logger.error("TTS failed: %s", e)
         if isinstance(e, TTSError):
             raise
         raise TTSError(f"Text-to-speech conversion failed: {str(e)}")
@@ -106,24 +244,33 @@ async def save_audio_file(audio_bytes: bytes, filename: str) -> Path:
     Raises:
         TTSError: If file saving fails
     """
+    filepath = TEMP_AUDIO_DIR / filename
+    # Unique per writer so workers rendering the same text never share a partial
+    partial_path = filepath.with_name(
+        f"{filepath.stem}.{os.getpid()}.{uuid.uuid4().hex}{PARTIAL_SUFFIX}"
+    )
+    
     try:
-        filepath = TEMP_AUDIO_DIR / filename
+        # aiofiles runs the blocking write in a worker thread
+        async with aiofiles.open(partial_path, "xb") as f:
+            await f.write(audio_bytes)
         
-        with open(filepath, "wb") as f:
-            f.write(audio_bytes)
+        # Atomic rename: a cache lookup never sees a half-written file
+        await aiofiles.os.replace(partial_path, filepath)
         
-        logger.debug(f"Audio saved to: {filepath}")
+        logger.debug("Audio saved to: %s", filepath)
         return filepath
         
     except Exception as e:
-        logger.error(f"Failed to save audio file: {e}")
+        logger.error("Failed to save audio file: %s", e)
+        await cleanup_audio_file(partial_path)
         raise TTSError(f"Failed to save audio: {str(e)}")
 
 
 async def process_tts_request(
     client: AsyncInferenceClient,
     text: str,
-) -> tuple[Path, int]:
+) -> TTSArtifact:
     """Process TTS request end-to-end.
     
     Args:
@@ -131,7 +278,7 @@ async def process_tts_request(
         text: Text to convert to speech
         
     Returns:
-        Tuple of (file_path, file_size_bytes)
+        TTSArtifact with the file path, stat result and estimated duration
         
     Raises:
         TTSError: If processing fails
@@ -139,50 +286,53 @@ async def process_tts_request(
     # Validate text
     validate_text_for_tts(text)
     
-    # Generate audio
-    audio_bytes = await text_to_speech(client, text)
-    
-    # Save to file
     filename = generate_audio_filename(text)
-    filepath = await save_audio_file(audio_bytes, filename)
+    filepath = TEMP_AUDIO_DIR / filename
+    duration = round(len(text) / CHARS_PER_SECOND, 1)
     
-    return filepath, len(audio_bytes)
+    # Fast path: audio this worker already holds needs neither the lock nor the API
+    if filename in _AUDIO_LRU:
+        stat_result = await _cached_audio_stat(filename, filepath)
+        if stat_result is not None:
+            logger.info("TTS cache hit: %s", filename)
+            await _remember_audio(filename, filepath, stat_result.st_size)
+            return TTSArtifact(path=filepath, stat_result=stat_result, duration=duration)
+    
+    lock = _TTS_LOCKS.get(filename)
+    if lock is None:
+        lock = _TTS_LOCKS[filename] = asyncio.Lock()
+    
+    async with lock:
+        # Re-check under the lock: a concurrent request or another worker
+        # may have produced the file meanwhile
+        stat_result = await _cached_audio_stat(filename, filepath)
+        if stat_result is not None:
+            logger.info("TTS cache hit: %s", filename)
+        else:
+            # Generate audio
+            audio_bytes = await text_to_speech(client, text)
+            
+            # Save to file
+            filepath = await save_audio_file(audio_bytes, filename)
+            
+            # Single stat, reused for Content-Length and FileResponse headers
+            stat_result = await aiofiles.os.stat(filepath)
+        
+        await _remember_audio(filename, filepath, stat_result.st_size)
+        return TTSArtifact(path=filepath, stat_result=stat_result, duration=duration)
 
 
-def cleanup_audio_file(filepath: Path) -> None:
+async def cleanup_audio_file(filepath: Path) -> None:
     """Delete temporary audio file.
     
     Args:
         filepath: Path to audio file
     """
     try:
-        if filepath.exists():
-            filepath.unlink()
-            logger.debug(f"Deleted audio file: {filepath}")
-    except Exception as e:
-        logger.warning(f"Failed to delete audio file {filepath}: {e}")
-
-
-def cleanup_old_audio_files(max_age_seconds: int = 3600) -> None:
-    """Clean up audio files older than specified age.
-    
-    Args:
-        max_age_seconds: Maximum age in seconds (default: 1 hour)
-    """
-    import time
-    
-    try:
-        current_time = time.time()
-        deleted_count = 0
-        
-        for filepath in TEMP_AUDIO_DIR.glob("audio_*.wav"):
-            file_age = current_time - filepath.stat().st_mtime
-            if file_age > max_age_seconds:
-                filepath.unlink()
-                deleted_count += 1
-        
-        if deleted_count > 0:
-            logger.info(f"Cleaned up {deleted_count} old audio files")
-            
+        # Remove directly rather than exists() + unlink(): one syscall, no race
+        await aiofiles.os.remove(filepath)
+        logger.debug("Deleted audio file: %s", filepath)
+    except FileNotFoundError:
+        pass
     except Exception as e:
-        logger.warning(f"Failed to cleanup old audio files: {e}")
+        logger.warning("Failed to delete audio file %s: %s", filepath, e)